@@ -1,4 +1,8 @@
+import functools
+import hashlib
+import time
 import httpx
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
@@ -16,6 +20,34 @@ from app.config import (
 
 security = HTTPBearer()
 
+# GitHub /user answers keyed by a token digest, so repeated logins within the
+# TTL skip a full HTTPS round-trip to api.github.com (and its rate limit).
+# OrderedDict gives us a cheap LRU cap.
+_gh_user_cache = OrderedDict()
+_GH_USER_TTL = 600.0
+_GH_USER_CACHE_MAX = 1024
+
+# Short-lived cache of authenticated users so a dashboard page that hits
+# /runs and /repos concurrently doesn't pay 2-3 DB round-trips for the same
+# token within a few seconds
+_user_cache = {}
+_USER_CACHE_TTL = 30.0
+
+
+@functools.lru_cache(maxsize=4096)
+def _decode_token(token: str):
+    """Decode and validate a JWT once per unique token string.
+
+    Returns (user_id, expires_at). Cached hits must still compare
+    expires_at against the clock, since the signature check here only
+    runs on the first sighting of a token.
+    """
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    user_id = payload.get("sub")
+    if isinstance(user_id, str):
+        user_id = int(user_id)
+    return user_id, payload.get("exp", 0)
+
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -25,64 +57,90 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-async def exchange_code_for_token(code: str):
-    """Exchange GitHub OAuth code for access token"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(
-                "https://github.com/login/oauth/access_token",
-                data={
-                    "client_id": GITHUB_CLIENT_ID,
-                    "client_secret": GITHUB_CLIENT_SECRET,
-                    "code": code,
-                },
-                headers={"Accept": "application/json"},
-            )
-            data = response.json()
-            
-            # Log the response for debugging
-            print(f"GitHub OAuth Response: {data}")
-            
-            # Check for errors in response
-            if "error" in data:
-                print(f"GitHub OAuth Error: {data.get('error')} - {data.get('error_description')}")
-                return None
-            
-            access_token = data.get("access_token")
-            if not access_token:
-                print(f"No access token in response: {data}")
-            
-            return access_token
-        except Exception as e:
-            print(f"Exception in exchange_code_for_token: {e}")
-            import traceback
-            traceback.print_exc()
+async def exchange_code_for_token(code: str, client: httpx.AsyncClient = None):
+    """Exchange GitHub OAuth code for access token
+
+    Reuses the caller's shared client when given (one TCP+TLS connection
+    for the whole login flow); falls back to a one-off client otherwise.
+    """
+    own_client = None
+    if client is None:
+        client = own_client = httpx.AsyncClient()
+    try:
+        response = await client.post(
+            "https://github.com/login/oauth/access_token",
+            data={
+                "client_id": GITHUB_CLIENT_ID,
+                "client_secret": GITHUB_CLIENT_SECRET,
+                "code": code,
+            },
+            headers={"Accept": "application/json"},
+        )
+        data = response.json()
+
+        # Log the response for debugging
+        print(f"GitHub OAuth Response: {data}")
+
+        # Check for errors in response
+        if "error" in data:
+            print(f"GitHub OAuth Error: {data.get('error')} - {data.get('error_description')}")
             return None
 
+        access_token = data.get("access_token")
+        if not access_token:
+            print(f"No access token in response: {data}")
+
+        return access_token
+    except Exception as e:
+        print(f"Exception in exchange_code_for_token: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
+    finally:
+        if own_client is not None:
+            await own_client.aclose()
+
 
-async def get_github_user(access_token: str):
+async def get_github_user(access_token: str, client: httpx.AsyncClient = None):
     """Get GitHub user info using access token"""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                "https://api.github.com/user",
-                headers={
-                    "Authorization": f"Bearer {access_token}",
-                    "Accept": "application/json",
-                },
-            )
-            data = response.json()
-            print(f"GitHub User Response: {data}")
-            
-            if "message" in data:
-                print(f"GitHub User API Error: {data.get('message')}")
-            
-            return data
-        except Exception as e:
-            print(f"Exception in get_github_user: {e}")
-            import traceback
-            traceback.print_exc()
-            return {}
+    cache_key = hashlib.blake2b(access_token.encode(), digest_size=16).hexdigest()
+    cached = _gh_user_cache.get(cache_key)
+    if cached and time.monotonic() < cached[1]:
+        _gh_user_cache.move_to_end(cache_key)
+        return cached[0]
+
+    own_client = None
+    if client is None:
+        client = own_client = httpx.AsyncClient()
+    try:
+        response = await client.get(
+            "https://api.github.com/user",
+            headers={
+                "Authorization": f"Bearer {access_token}",
+                "Accept": "application/json",
+            },
+        )
+        data = response.json()
+        print(f"GitHub User Response: {data}")
+
+        if "message" in data:
+            print(f"GitHub User API Error: {data.get('message')}")
+        else:
+            # Only cache successful lookups
+            _gh_user_cache[cache_key] = (data, time.monotonic() + _GH_USER_TTL)
+            _gh_user_cache.move_to_end(cache_key)
+            while len(_gh_user_cache) > _GH_USER_CACHE_MAX:
+                _gh_user_cache.popitem(last=False)
+
+        return data
+    except Exception as e:
+        print(f"Exception in get_github_user: {e}")
+        import traceback
+        traceback.print_exc()
+        return {}
+    finally:
+        if own_client is not None:
+            await own_client.aclose()
 
 
 async def get_current_user(
@@ -98,28 +156,33 @@ async def get_current_user(
     
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id = payload.get("sub")
+        user_id, expires_at = _decode_token(token)
         if user_id is None:
             raise credentials_exception
-        
-        # Convert to int if it's a string
-        if isinstance(user_id, str):
-            try:
-                user_id = int(user_id)
-            except ValueError:
-                raise credentials_exception
-                
+
+        # Cached decodes skip the signature check, so re-verify expiry here
+        if time.time() >= expires_at:
+            raise credentials_exception
+
+    except HTTPException:
+        raise
     except JWTError as e:
         print(f"JWT Error: {e}")
         raise credentials_exception
     except Exception as e:
         print(f"Token validation error: {e}")
         raise credentials_exception
-    
+
+    # Serve recently-seen users from the short TTL cache before the DB
+    cached = _user_cache.get(user_id)
+    now = time.monotonic()
+    if cached and now - cached[1] < _USER_CACHE_TTL:
+        return cached[0]
+
     user = db.query(User).filter(User.id == user_id).first()
     if user is None:
         print(f"User not found for id: {user_id}")
         raise credentials_exception
-    
+
+    _user_cache[user_id] = (user, now)
     return user
@@ -4,12 +4,15 @@ from sqlalchemy.orm import sessionmaker
 from app.config import DATABASE_URL
 
 # Create engine with connection pooling and keep-alive
+# Sized for concurrent /runs, /repos, WebSocket and long /run-agent traffic
+# so bursts don't hit QueuePool limit timeouts
 engine = create_engine(
     DATABASE_URL,
-    pool_size=10,
+    pool_size=20,
     max_overflow=20,
+    pool_timeout=30,     # Fail fast instead of queueing forever under load
     pool_pre_ping=True,  # Verify connections before using
-    pool_recycle=3600,   # Recycle connections every hour
+    pool_recycle=1800,   # Recycle connections every 30 minutes
     connect_args={
         "keepalives": 1,
         "keepalives_idle": 30,
@@ -17,7 +20,9 @@ engine = create_engine(
         "keepalives_count": 5,
     }
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False keeps attribute values loaded after commit, so
+# reading e.g. run.id post-commit doesn't issue a refresh SELECT
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
 
 Base = declarative_base()
 
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, JSON, ForeignKey, Index, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.database import Base
@@ -36,5 +36,10 @@ class AgentRun(Base):
     duration = Column(String, nullable=True)
     error_message = Column(Text, nullable=True)  # Error details if FAILED
     created_at = Column(DateTime, default=datetime.utcnow)
-    
+
     user = relationship("User", back_populates="runs")
+
+    # Supports the /runs listing (filter by user, newest first)
+    __table_args__ = (
+        Index("ix_agent_runs_user_created", "user_id", "created_at"),
+    )
@@ -2,11 +2,63 @@
 JavaScript/TypeScript Error Parser
 Handles Jest, Mocha, Vitest, ESLint errors
 """
-import re
+import functools
+import io
+import logging
 import os
+
+# Prefer google-re2's linear-time engine for the hot patterns when it is
+# installed; its compiled objects are drop-in for search/match here and give
+# worst-case linear behavior on adversarial log input. Fall back to the
+# stdlib backtracking engine otherwise.
+try:
+    import re2 as re
+except ImportError:
+    import re
+from collections import deque
+from itertools import islice
 from typing import List, Tuple
 from ..models import ErrorInfo, ErrorType
 
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1024)
+def _translate_path(file_path: str, repo_path: str) -> str:
+    """Map a /workspace container path onto the host repo and normalize it.
+
+    The same file recurs across dozens of diagnostics in a big lint run, so
+    the join/normpath work is memoized per unique (file, repo) pair.
+    """
+    if file_path.startswith('/workspace'):
+        # The input shape is fixed here (/workspace/<rel> onto repo_path), so
+        # plain string concatenation beats the general-purpose os.path.join
+        relative_path = file_path[len('/workspace'):].lstrip('/\\')
+        file_path = repo_path.rstrip('/\\') + '/' + relative_path
+    file_path = file_path.replace('\\', '/')
+    # Only fall back to the (pure-Python, slow) normpath when the path
+    # actually needs normalizing
+    if '..' in file_path or '//' in file_path or '/./' in file_path:
+        file_path = os.path.normpath(file_path)
+    return file_path
+
+
+def _iter_with_context(text: str, width: int = 5):
+    """Yield (line, window) pairs over text without materializing all lines.
+
+    The window is a deque holding the current line plus up to the next
+    width-1 lines, so only a handful of lines are alive at any time even
+    for multi-MB test outputs.
+    """
+    lines = (l.rstrip('\n') for l in io.StringIO(text))
+    window = deque(islice(lines, width), maxlen=width)
+    while window:
+        yield window[0], window
+        nxt = next(lines, None)
+        window.popleft()
+        if nxt is not None:
+            window.append(nxt)
+
 
 class JavaScriptParser:
     """Parse JavaScript/TypeScript test errors"""
@@ -74,6 +126,21 @@ class JavaScriptParser:
             r'File:\s+([/\\]?[\w/\\.-]+\.(?:js|ts|jsx|tsx)):(\d+)',
         ]
         
+        # System/vendor paths to skip, as a single compiled alternation so the
+        # check is one C-level scan instead of a Python loop of substring tests.
+        # dist/build are anchored to path separators to avoid false positives
+        # on real source files like builder.js.
+        self._skip_re = re.compile(
+            r'node_modules'
+            r'|(?:^|[/\\])dist(?:[/\\]|$)'
+            r'|(?:^|[/\\])build(?:[/\\]|$)'
+            r'|\.next'
+            r'|coverage'
+            r'|jest-runtime'
+            r'|/usr/lib'
+            r'|/usr/local'
+        )
+
         # ESLint-specific error type patterns
         self.eslint_patterns = {
             'no-unused-vars': ErrorType.LOGIC,
@@ -88,25 +155,34 @@ class JavaScriptParser:
     def parse_errors(self, test_output: str, repo_path: str = None) -> List[ErrorInfo]:
         """Parse Jest/Mocha/Vitest/ESLint test output"""
         errors = []
-        lines = test_output.split('\n')
         seen_errors = set()  # Deduplicate
+        seen_raw = set()  # Cheap prefilter before any path normalization
         
-        print(f"[JS-PARSER] Parsing errors from test output (repo_path={repo_path})")
+        logger.debug("Parsing errors from test output (repo_path=%s)", repo_path)
         
         # Check for ESLint multi-line format first
         # ESLint format: filename on one line, then indented error lines like:  
         # /workspace/src/App.jsx
         #   1:8  error  'React' is defined but never used  no-unused-vars
         current_file = None
-        for i, line in enumerate(lines):
+        for line, window in _iter_with_context(test_output):
+            # Blank lines dominate real logs; skip them before any other work
+            if not line:
+                continue
+
             # Check if this line is a file path (ESLint header)
-            if line.strip() and not line.startswith(' ') and re.match(r'^[/\\]?[\w/\\.-]+\.(?:js|ts|jsx|tsx)$', line.strip()):
-                current_file = line.strip()
-                print(f"[JS-PARSER] Found ESLint file header: {current_file}")
+            stripped = line.strip()
+            if stripped and line[:1] not in (' ', '\t') and re.match(r'^[/\\]?[\w/\\.-]+\.(?:js|ts|jsx|tsx)$', stripped):
+                current_file = stripped
+                logger.debug("Found ESLint file header: %s", current_file)
                 continue
             
             # Check if this is an indented error line (ESLint error detail)
-            if current_file and line.startswith('  ') and ':' in line:
+            # Cheap prefilter: the line must start with "line:col", so the
+            # first non-space character is a digit with a ':' close behind it.
+            # This keeps stack frames and banner lines away from the regex.
+            s = line.lstrip()
+            if current_file and line.startswith('  ') and s[:1].isdigit() and ':' in s[:6]:
                 # Pattern: "  1:8  error  message  rule-name"
                 eslint_match = re.match(r'^\s+(\d+):(\d+)\s+(error|warning)\s+(.+?)(?:\s+([a-z/-]+))?$', line)
                 if eslint_match:
@@ -115,28 +191,29 @@ class JavaScriptParser:
                     message = eslint_match.group(4).strip()
                     rule = eslint_match.group(5) if eslint_match.group(5) else None
                     
-                    print(f"[JS-PARSER] Found ESLint error: {current_file}:{line_num} - {message} ({rule})")
-                    
-                    # Convert Docker paths
+                    logger.debug("Found ESLint error: %s:%s - %s (%s)", current_file, line_num, message, rule)
+
+                    # Dedup on the raw (file, line) before doing any path work
+                    raw_key = (current_file, line_num)
+                    if raw_key in seen_raw:
+                        continue
+                    seen_raw.add(raw_key)
+
+                    # Convert Docker paths and normalize (memoized per file)
                     file_path = current_file
                     if file_path.startswith('/workspace'):
-                        if repo_path:
-                            relative_path = file_path[len('/workspace'):].lstrip('/')
-                            file_path = os.path.join(repo_path, relative_path)
-                            print(f"[JS-PARSER] 🐳 Converted container path: {file_path}")
-                        else:
-                            print(f"[JS-PARSER] ❌ Skipped (no repo_path)")
+                        if not repo_path:
+                            logger.debug("Skipped (no repo_path)")
                             continue
-                    
+                        file_path = _translate_path(file_path, repo_path)
+                        logger.debug("Converted container path: %s", file_path)
+                    elif repo_path:
+                        file_path = _translate_path(file_path, repo_path)
+
                     # Skip system files
-                    skip_patterns = ['node_modules', 'dist', 'build', '.next', 'coverage']
-                    if any(p in file_path for p in skip_patterns):
+                    if self._skip_re.search(file_path):
                         continue
-                    
-                    # Normalize path
-                    if repo_path:
-                        file_path = os.path.normpath(file_path)
-                    
+
                     # Determine error type from rule
                     error_type = self._get_eslint_error_type(rule, message)
                     
@@ -144,7 +221,7 @@ class JavaScriptParser:
                     error_key = f"{file_path}:{line_num}:{error_type.value}"
                     if error_key not in seen_errors:
                         seen_errors.add(error_key)
-                        print(f"[JS-PARSER] ✅ {error_type.value}: {file_path}:{line_num}")
+                        logger.debug("%s: %s:%s", error_type.value, file_path, line_num)
                         errors.append(ErrorInfo(
                             file=file_path,
                             line=line_num,
@@ -159,26 +236,27 @@ class JavaScriptParser:
                 if match:
                     file_path = match.group(1)
                     line_num = int(match.group(2))
-                    
-                    # Convert Docker paths
+
+                    # Dedup on the raw (file, line) before doing any path work
+                    raw_key = (file_path, line_num)
+                    if raw_key in seen_raw:
+                        break
+                    seen_raw.add(raw_key)
+
+                    # Convert Docker paths and normalize (memoized per file)
                     if file_path.startswith('/workspace'):
-                        if repo_path:
-                            relative_path = file_path[len('/workspace'):].lstrip('/')
-                            file_path = os.path.join(repo_path, relative_path)
-                        else:
+                        if not repo_path:
                             continue
-                    
+                        file_path = _translate_path(file_path, repo_path)
+                    elif repo_path:
+                        file_path = _translate_path(file_path, repo_path)
+
                     # Skip system files
-                    skip_patterns = ['node_modules', 'dist', 'build', '.next', 'coverage', 'jest-runtime', '/usr/lib', '/usr/local']
-                    if any(p in file_path for p in skip_patterns):
+                    if self._skip_re.search(file_path):
                         continue
-                    
-                    # Normalize path
-                    if repo_path:
-                        file_path = os.path.normpath(file_path)
-                    
+
                     # Identify error type
-                    error_type, message = self._identify_error_type(line, lines[i:min(i+5, len(lines))])
+                    error_type, message = self._identify_error_type(line, window)
                     
                     if error_type:
                         error_key = f"{file_path}:{line_num}:{error_type.value}"
@@ -192,7 +270,7 @@ class JavaScriptParser:
                             ))
                     break
         
-        print(f"[JS-PARSER] Total errors detected: {len(errors)}")
+        logger.debug("Total errors detected: %d", len(errors))
         return errors
     
     def _get_eslint_error_type(self, rule: str, message: str) -> ErrorType:
@@ -220,26 +298,35 @@ class JavaScriptParser:
     
     def _identify_error_type(self, current_line: str, context_lines: List[str]) -> Tuple:
         """Identify JavaScript error type from context"""
-        # Combine current line and next few lines for context
-        combined_text = '\n'.join(context_lines)
-        
         # Check for ESLint rule names first (most specific)
         # ESLint format: file.js  1:1  error  message  rule-name
-        eslint_rule_match = re.search(r'([\w/-]+)\s*$', current_line)
-        if eslint_rule_match:
-            rule_name = eslint_rule_match.group(1)
+        # The trailing rule token and the message can both be carved out with
+        # plain string ops, which are much cheaper than regex here
+        parts = current_line.rstrip().rsplit(None, 1)
+        rule_name = parts[-1] if parts else ''
+        if rule_name:
             # Check if this matches known ESLint rules
             for pattern, error_type in self.eslint_patterns.items():
                 if pattern in rule_name:
-                    # Extract the full error message
-                    message_match = re.search(r'(?:error|warning)\s+(.+?)\s+[\w/-]+\s*$', current_line)
-                    if message_match:
-                        message = message_match.group(1).strip()
+                    # Extract the message between the error/warning marker
+                    # and the trailing rule name
+                    idx = current_line.find(' error ')
+                    marker_len = len(' error ')
+                    if idx == -1:
+                        idx = current_line.find(' warning ')
+                        marker_len = len(' warning ')
+                    if idx != -1:
+                        message = current_line[idx + marker_len:].rstrip()
+                        if message.endswith(rule_name):
+                            message = message[:-len(rule_name)]
+                        message = message.strip()
                     else:
                         message = current_line.strip()
                     return error_type, f"{message} ({rule_name})"
         
-        # Fall back to generic pattern matching
+        # Fall back to generic pattern matching; only now pay for joining the
+        # current line with the next few lines of context
+        combined_text = '\n'.join(context_lines)
         for error_type, patterns in self.error_patterns.items():
             for pattern in patterns:
                 if re.search(pattern, combined_text, re.IGNORECASE):
@@ -11,7 +11,11 @@ from ..models import ErrorInfo
 
 class JavaScriptPlugin(LanguagePlugin):
     """JavaScript/TypeScript language support"""
-    
+
+    # Class-level constants so polling callers don't allocate per call
+    _TEST_CMD = ('npm', 'test', '--', '--ci', '--colors', '--passWithNoTests')
+    _FILE_EXTENSIONS = ('.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs')
+
     def __init__(self):
         self.parser = JavaScriptParser()
         self.fixer = JavaScriptFixer()
@@ -24,7 +28,8 @@ class JavaScriptPlugin(LanguagePlugin):
     
     def get_test_command(self) -> List[str]:
         # Jest is most common, but could detect from package.json
-        return ['npm', 'test', '--', '--ci', '--colors', '--passWithNoTests']
+        # (copy, since callers may mutate the returned list)
+        return list(self._TEST_CMD)
     
     def parse_errors(self, test_output: str, repo_path: str) -> List[ErrorInfo]:
         return self.parser.parse_errors(test_output, repo_path)
@@ -33,4 +38,4 @@ class JavaScriptPlugin(LanguagePlugin):
         return self.fixer.fix_error(error)
     
     def get_file_extensions(self) -> List[str]:
-        return ['.js', '.jsx', '.ts', '.tsx', '.mjs', '.cjs']
+        return list(self._FILE_EXTENSIONS)
@@ -2,6 +2,9 @@
 Python Language Plugin
 Wraps existing Python parser and fixer
 """
+import functools
+import os
+import threading
 from typing import List
 from .base import LanguagePlugin
 from ..parser import ErrorParser
@@ -9,13 +12,24 @@ from ..fixer import FixEngine
 from ..models import ErrorInfo
 
 
+@functools.lru_cache(maxsize=1024)
+def _derive_repo_path(file_path: str) -> str:
+    """Assume the repo is a few levels up from the error file"""
+    return os.path.dirname(os.path.dirname(file_path))
+
+
 class PythonPlugin(LanguagePlugin):
     """Python language support"""
-    
+
+    # Class-level constants so polling callers don't allocate per call
+    _TEST_CMD = ('python', '-m', 'pytest', '--maxfail=10', '-v', '--tb=short')
+    _FILE_EXTENSIONS = ('.py',)
+
     def __init__(self, repo_path: str = None):
         self.parser = ErrorParser()
         self.fixer = FixEngine(repo_path) if repo_path else None
         self.repo_path = repo_path
+        self._fixer_lock = threading.Lock()
     
     def get_name(self) -> str:
         return "python"
@@ -24,23 +38,22 @@ class PythonPlugin(LanguagePlugin):
         return "rift-agent:latest"
     
     def get_test_command(self) -> List[str]:
-        return ['python', '-m', 'pytest', '--maxfail=10', '-v', '--tb=short']
+        # Copy, since callers may mutate the returned list
+        return list(self._TEST_CMD)
     
     def parse_errors(self, test_output: str, repo_path: str) -> List[ErrorInfo]:
         return self.parser.parse_errors(test_output, repo_path)
     
     def fix_error(self, error: ErrorInfo) -> bool:
-        # Lazy initialization of fixer if not set
-        if self.fixer is None:
-            # Extract repo path from error file path if needed
-            import os
-            if error.file:
-                # Assume repo is a few levels up from the error file
-                repo_path = os.path.dirname(os.path.dirname(error.file))
-                self.fixer = FixEngine(repo_path)
-        
+        # Lazy initialization of fixer if not set; double-checked locking so
+        # concurrent callers from a threadpool construct FixEngine only once
+        if self.fixer is None and error.file:
+            with self._fixer_lock:
+                if self.fixer is None:
+                    self.fixer = FixEngine(_derive_repo_path(error.file))
+
         # FixEngine uses apply_fix(), so call that
         return self.fixer.apply_fix(error) if self.fixer else False
     
     def get_file_extensions(self) -> List[str]:
-        return ['.py']
+        return list(self._FILE_EXTENSIONS)
@@ -1,12 +1,14 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import List
 import json
 from app.models import AgentRequest, AgentResponse
 from app.docker_runner import DockerRunner
-from app.database import engine, get_db
+from app.database import engine, get_db, SessionLocal
 from app.db_models import Base, User, AgentRun
 from app.auth import (
     exchange_code_for_token,
@@ -19,6 +21,7 @@ from pydantic import BaseModel
 import uvicorn
 import httpx
 import asyncio
+import time
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -26,7 +29,10 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="AI DevOps Agent API",
     description="Automated test fixing and deployment agent",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson serializes the big /runs and /repos lists in C instead of
+    # stdlib json's pure-Python encoder
+    default_response_class=ORJSONResponse
 )
 
 # Startup event to capture event loop
@@ -43,6 +49,22 @@ async def startup_event():
     os.makedirs(WORKSPACE_DIR, exist_ok=True)
     print(f"✅ Workspace directory ready: {WORKSPACE_DIR}")
 
+    # Shared HTTP client for GitHub API calls - keep-alive connections and
+    # reused TLS sessions instead of a new handshake per request
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+        timeout=httpx.Timeout(10.0),
+        headers={"Accept": "application/vnd.github.v3+json"}
+    )
+    print(f"✅ Shared HTTP client ready")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Close the shared HTTP client"""
+    await app.state.http.aclose()
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -79,22 +101,11 @@ async def websocket_endpoint(websocket: WebSocket, run_id: str):
     await ws_manager.connect(websocket, run_id)
     try:
         print(f"🔌 WebSocket connection established for run #{run_id}")
-        # Keep connection alive and listen for client messages
+        # Keepalive is handled by protocol-level PING/PONG frames (see
+        # ws_ping_interval/ws_ping_timeout on uvicorn.run); here we only
+        # need to drain incoming client messages until disconnect
         while True:
-            try:
-                # Wait for client message with timeout
-                data = await asyncio.wait_for(websocket.receive_text(), timeout=30.0)
-                print(f"📨 Received from client (run #{run_id}): {data}")
-                # Echo back to confirm connection
-                await websocket.send_json({"type": "ping", "data": "pong"})
-            except asyncio.TimeoutError:
-                # Send keepalive ping every 30 seconds
-                try:
-                    await websocket.send_json({"type": "keepalive", "timestamp": __import__('datetime').datetime.now().isoformat()})
-                    print(f"💓 Sent keepalive to run #{run_id}")
-                except:
-                    print(f"❌ Failed to send keepalive to run #{run_id}, closing connection")
-                    break
+            await websocket.receive_text()
     except WebSocketDisconnect:
         print(f"🔌 Client disconnected from run #{run_id}")
         ws_manager.disconnect(websocket, run_id)
@@ -104,16 +115,26 @@ async def websocket_endpoint(websocket: WebSocket, run_id: str):
 
 
 @app.post("/auth/github/callback", response_model=AuthResponse)
-async def github_callback(request: GitHubCallbackRequest, db: Session = Depends(get_db)):
+async def github_callback(
+    request: GitHubCallbackRequest,
+    http_request: Request,
+    db: Session = Depends(get_db),
+):
     """Handle GitHub OAuth callback"""
     try:
+        # Both GitHub calls ride the shared pooled client, so the user fetch
+        # reuses the TLS connection the token exchange just opened. The two
+        # calls themselves stay sequential — the second needs the token the
+        # first returns — as does the DB upsert, which needs the user payload.
+        client = http_request.app.state.http
+
         # Exchange code for access token
-        access_token = await exchange_code_for_token(request.code)
+        access_token = await exchange_code_for_token(request.code, client=client)
         if not access_token:
             raise HTTPException(status_code=400, detail="Failed to get access token")
-        
+
         # Get GitHub user info
-        github_user = await get_github_user(access_token)
+        github_user = await get_github_user(access_token, client=client)
         
         # Validate GitHub user response
         if not github_user or "id" not in github_user:
@@ -184,44 +205,69 @@ async def debug_token(authorization: str = Header(None)):
     }
 
 
+# Per-user cache of the last /repos answer: user_id -> (etag, repos, fetched_at)
+# GitHub answers 304 with no body when the ETag still matches, so unchanged
+# repo lists cost neither bandwidth nor rate limit
+_repo_cache = {}
+_REPO_CACHE_TTL = 60.0
+
+
 @app.get("/repos")
-async def get_user_repos(current_user: User = Depends(get_current_user)):
+async def get_user_repos(request: Request, current_user: User = Depends(get_current_user)):
     """Fetch user's GitHub repositories"""
     try:
-        async with httpx.AsyncClient() as client:
-            # Fetch user's repositories
-            response = await client.get(
-                "https://api.github.com/user/repos",
-                headers={
-                    "Authorization": f"token {current_user.access_token}",
-                    "Accept": "application/vnd.github.v3+json"
-                },
-                params={
-                    "per_page": 100,
-                    "sort": "updated",
-                    "affiliation": "owner,collaborator,organization_member"
-                }
-            )
-            response.raise_for_status()
-            repos = response.json()
-            
-            # Format repositories for frontend
-            formatted_repos = []
-            for repo in repos:
-                formatted_repos.append({
-                    "id": repo["id"],
-                    "name": repo["name"],
-                    "full_name": repo["full_name"],
-                    "html_url": repo["html_url"],
-                    "clone_url": repo["clone_url"],
-                    "description": repo.get("description"),
-                    "private": repo["private"],
-                    "language": repo.get("language"),
-                    "updated_at": repo["updated_at"],
-                    "default_branch": repo.get("default_branch", "main")
-                })
-            
-            return {"repositories": formatted_repos}
+        # Fresh-enough cached answer: skip GitHub entirely
+        cached = _repo_cache.get(current_user.id)
+        now = time.monotonic()
+        if cached and now - cached[2] < _REPO_CACHE_TTL:
+            return {"repositories": cached[1]}
+
+        headers = {
+            "Authorization": f"token {current_user.access_token}",
+            "Accept": "application/vnd.github.v3+json"
+        }
+        if cached:
+            headers["If-None-Match"] = cached[0]
+
+        # Reuse the shared client so repeated listings ride the same
+        # keep-alive connection to api.github.com
+        client = request.app.state.http
+        response = await client.get(
+            "https://api.github.com/user/repos",
+            headers=headers,
+            params={
+                "per_page": 100,
+                "sort": "updated",
+                "affiliation": "owner,collaborator,organization_member"
+            }
+        )
+
+        # Unchanged since last fetch - serve the cached list
+        if response.status_code == 304 and cached:
+            _repo_cache[current_user.id] = (cached[0], cached[1], now)
+            return {"repositories": cached[1]}
+
+        response.raise_for_status()
+        repos = response.json()
+
+        # Format repositories for frontend
+        formatted_repos = []
+        for repo in repos:
+            formatted_repos.append({
+                "id": repo["id"],
+                "name": repo["name"],
+                "full_name": repo["full_name"],
+                "html_url": repo["html_url"],
+                "clone_url": repo["clone_url"],
+                "description": repo.get("description"),
+                "private": repo["private"],
+                "language": repo.get("language"),
+                "updated_at": repo["updated_at"],
+                "default_branch": repo.get("default_branch", "main")
+            })
+
+        _repo_cache[current_user.id] = (response.headers.get("ETag", ""), formatted_repos, now)
+        return {"repositories": formatted_repos}
     except httpx.HTTPStatusError as e:
         raise HTTPException(status_code=e.response.status_code, detail="Failed to fetch repositories")
     except Exception as e:
@@ -231,8 +277,7 @@ async def get_user_repos(current_user: User = Depends(get_current_user)):
 @app.post("/run-agent", response_model=AgentResponse)
 async def run_agent(
     request: AgentRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """
     Main endpoint to run the AI DevOps agent
@@ -265,11 +310,15 @@ async def run_agent(
         fixes=[],
         duration="0:00:00"
     )
-    db.add(agent_run)
-    db.commit()
-    db.refresh(agent_run)
-    
-    run_id = agent_run.id
+    # Short session scope: insert the RUNNING row, then release the pool
+    # connection before the multi-minute agent work starts. Holding the
+    # request session across runner.run() pins a connection per in-flight
+    # agent and starves the pool under concurrency.
+    with SessionLocal() as db:
+        db.add(agent_run)
+        db.commit()
+        run_id = agent_run.id
+
     print(f"🚀 Started run #{run_id} for {repo_name}")
     
     # Send initial progress update
@@ -286,32 +335,35 @@ async def run_agent(
             run_id=run_id
         )
         
-        # Execute the agent
-        result = runner.run()
-        
+        # Execute the agent in a worker thread - runner.run() is synchronous
+        # and would otherwise block the event loop (and every other request
+        # and WebSocket) for the duration of the run
+        result = await asyncio.to_thread(runner.run)
+
         # Calculate duration
         duration = str(datetime.utcnow() - start_time).split('.')[0]
-        
-        # Update existing database record with results
-        agent_run.branch = result.branch
-        agent_run.status = result.status
-        agent_run.total_failures = result.total_failures
-        agent_run.total_fixes = result.total_fixes
-        agent_run.iterations = result.iterations
-        agent_run.fixes = [fix.dict() for fix in result.fixes]
-        agent_run.duration = duration
-        
-        db.commit()
-        db.refresh(agent_run)
-        
-        # Debug logging
-        print(f"✅ Run #{run_id} completed with status: {result.status}")
-        
-        # Update result with database fields
-        result.id = agent_run.id
-        result.created_at = agent_run.created_at.isoformat()
-        result.duration = duration
-        result.repo_name = agent_run.repo_name
+
+        # Fresh short session to write the results
+        with SessionLocal() as db:
+            agent_run = db.get(AgentRun, run_id)
+            agent_run.branch = result.branch
+            agent_run.status = result.status
+            agent_run.total_failures = result.total_failures
+            agent_run.total_fixes = result.total_fixes
+            agent_run.iterations = result.iterations
+            agent_run.fixes = [fix.model_dump() for fix in result.fixes]
+            agent_run.duration = duration
+
+            db.commit()
+
+            # Debug logging
+            print(f"✅ Run #{run_id} completed with status: {result.status}")
+
+            # Update result with database fields
+            result.id = agent_run.id
+            result.created_at = agent_run.created_at.isoformat()
+            result.duration = duration
+            result.repo_name = agent_run.repo_name
         
         # Debug logging - print full response
         print(f"📤 Returning response with ID: {result.id}")
@@ -327,11 +379,14 @@ async def run_agent(
         print(error_details)
         
         duration = str(datetime.utcnow() - start_time).split('.')[0]
-        agent_run.status = "FAILED"
-        agent_run.duration = duration
-        agent_run.error_message = f"{str(e)}\n\nStacktrace:\n{error_details}"
-        db.commit()
-        
+        with SessionLocal() as db:
+            agent_run = db.get(AgentRun, run_id)
+            if agent_run:
+                agent_run.status = "FAILED"
+                agent_run.duration = duration
+                agent_run.error_message = f"{str(e)}\n\nStacktrace:\n{error_details}"
+                db.commit()
+
         raise HTTPException(status_code=500, detail=f"Agent execution failed: {str(e)}")
 
 
@@ -366,8 +421,7 @@ async def run_agent_async(
     )
     db.add(agent_run)
     db.commit()
-    db.refresh(agent_run)
-    
+
     run_id = agent_run.id
     print(f"🚀 [ASYNC] Started run #{run_id} for {repo_name}")
     
@@ -398,14 +452,14 @@ async def run_agent_async(
                 
                 # Update database
                 duration = str(datetime.utcnow() - start_time).split('.')[0]
-                bg_run = bg_db.query(AgentRun).filter(AgentRun.id == run_id).first()
+                bg_run = bg_db.get(AgentRun, run_id)
                 if bg_run:
                     bg_run.branch = result.branch
                     bg_run.status = result.status
                     bg_run.total_failures = result.total_failures
                     bg_run.total_fixes = result.total_fixes
                     bg_run.iterations = result.iterations
-                    bg_run.fixes = [fix.dict() for fix in result.fixes]
+                    bg_run.fixes = [fix.model_dump() for fix in result.fixes]
                     bg_run.duration = duration
                     bg_db.commit()
                 
@@ -422,7 +476,7 @@ async def run_agent_async(
             bg_db = SessionLocal()
             try:
                 duration = str(datetime.utcnow() - start_time).split('.')[0]
-                bg_run = bg_db.query(AgentRun).filter(AgentRun.id == run_id).first()
+                bg_run = bg_db.get(AgentRun, run_id)
                 if bg_run:
                     bg_run.status = "FAILED"
                     bg_run.duration = duration
@@ -449,24 +503,44 @@ async def get_runs(
     db: Session = Depends(get_db)
 ):
     """Get all runs for the current user"""
-    runs = db.query(AgentRun).filter(AgentRun.user_id == current_user.id).order_by(AgentRun.created_at.desc()).all()
-    
+    # Projection query: the list view never shows the potentially huge
+    # fixes JSON or error_message, so don't fetch them or hydrate full
+    # ORM instances per row
+    stmt = (
+        select(
+            AgentRun.id,
+            AgentRun.repo,
+            AgentRun.repo_name,
+            AgentRun.branch,
+            AgentRun.team,
+            AgentRun.leader,
+            AgentRun.status,
+            AgentRun.total_failures,
+            AgentRun.total_fixes,
+            AgentRun.iterations,
+            AgentRun.duration,
+            AgentRun.created_at,
+        )
+        .where(AgentRun.user_id == current_user.id)
+        .order_by(AgentRun.created_at.desc())
+    )
+
     return [
         {
-            "id": run.id,
-            "repo": run.repo,
-            "repo_name": run.repo_name,
-            "branch": run.branch,
-            "team": run.team,
-            "leader": run.leader,
-            "status": run.status,
-            "total_failures": run.total_failures,
-            "total_fixes": run.total_fixes,
-            "iterations": run.iterations,
-            "duration": run.duration,
-            "created_at": run.created_at.isoformat(),
+            "id": row["id"],
+            "repo": row["repo"],
+            "repo_name": row["repo_name"],
+            "branch": row["branch"],
+            "team": row["team"],
+            "leader": row["leader"],
+            "status": row["status"],
+            "total_failures": row["total_failures"],
+            "total_fixes": row["total_fixes"],
+            "iterations": row["iterations"],
+            "duration": row["duration"],
+            "created_at": row["created_at"].isoformat(),
         }
-        for run in runs
+        for row in db.execute(stmt).mappings()
     ]
 
 
@@ -477,10 +551,12 @@ async def get_run(
     db: Session = Depends(get_db)
 ):
     """Get a specific run by ID"""
-    run = db.query(AgentRun).filter(
-        AgentRun.id == run_id,
-        AgentRun.user_id == current_user.id
-    ).first()
+    run = db.scalar(
+        select(AgentRun).where(
+            AgentRun.id == run_id,
+            AgentRun.user_id == current_user.id,
+        )
+    )
     
     if not run:
         raise HTTPException(status_code=404, detail="Run not found")
@@ -520,4 +596,17 @@ def health_check():
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    import os
+    # uvloop's C event loop + httptools' C HTTP parser. Worker count stays
+    # at 1 unless WEB_CONCURRENCY is set, because WebSocket progress state
+    # lives in-process and doesn't shard across workers.
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        ws_ping_interval=20,
+        ws_ping_timeout=20,
+        workers=int(os.getenv("WEB_CONCURRENCY", "1"))
+    )
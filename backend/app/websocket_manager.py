@@ -1,26 +1,98 @@
 """WebSocket connection manager for real-time progress updates"""
-from typing import Dict, Set
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Deque, Dict, Optional, Set
 from fastapi import WebSocket
 import json
 import asyncio
+import logging
+import queue
+import threading
+import time
 from concurrent.futures import ThreadPoolExecutor
 
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    def _encode(obj) -> str:
+        """Serialize a frame once for all connections"""
+        # orjson serializes dataclasses natively, no dict detour
+        return orjson.dumps(obj).decode()
+except ImportError:
+    def _encode(obj) -> str:
+        """Serialize a frame once for all connections"""
+        return json.dumps(obj, default=asdict)
+
+
+@dataclass(slots=True, frozen=True)
+class Progress:
+    """One progress event as it travels the queues and the wire.
+
+    slots halves the per-event footprint versus a dict — the offline
+    backlogs hold up to QUEUE_MAXLEN of these per run — and frozen makes
+    sharing across queues and batch frames safe.
+    """
+    status: str
+    message: str
+    timestamp: str
+    data: Optional[dict] = None
+
+# Backlog kept per run while no client is connected. Bounded so a run that
+# logs heavily before anyone opens the dashboard can't grow memory without
+# limit — old entries fall off the front once the cap is hit. Backlogs that
+# nobody reconnects to within the TTL are dropped by the housekeeping task.
+QUEUE_MAXLEN = 1000
+QUEUE_TTL = 300.0
+_HOUSEKEEPING_INTERVAL = 60.0
+
+# Max messages coalesced into a single WebSocket frame. Caps single-write
+# size so one giant frame can't stall the socket, while still collapsing a
+# burst of agent output into a handful of frames instead of hundreds.
+BATCH_MAX = 128
+
 
 class ConnectionManager:
     """Manages WebSocket connections for agent runs"""
-    
+
     def __init__(self):
         # Map of run_id -> set of websocket connections
         self.active_connections: Dict[str, Set[WebSocket]] = {}
-        self.locks: Dict[str, asyncio.Lock] = {}
         # Store the main event loop reference
         self.main_loop = None
         # Progress queue for thread-safe communication
-        self.progress_queue: Dict[str, list] = {}
-    
+        self.progress_queue: Dict[str, Deque[Progress]] = {}
+        # Per-run live queue + flusher task that coalesces queued messages
+        # into batched frames ({"batch": [...]}) for connected clients
+        self._send_queues: Dict[str, asyncio.Queue] = {}
+        self._flushers: Dict[str, asyncio.Task] = {}
+        # run_id -> monotonic deadline after which an orphaned backlog is
+        # dropped; pruned by the housekeeping task
+        self._queue_expiry: Dict[str, float] = {}
+        self._housekeeper = None
+        # Lock-free channel from worker threads to the loop: producers put
+        # (run_id, msg) tuples here and schedule at most one wake callback
+        # per burst instead of one run_coroutine_threadsafe Future each
+        self._tx = queue.SimpleQueue()
+        self._wake_scheduled = threading.Event()
+
     def set_loop(self, loop):
-        """Set the main event loop reference"""
+        """Set the main event loop reference and start queue housekeeping"""
         self.main_loop = loop
+        if self._housekeeper is None:
+            self._housekeeper = loop.create_task(self._housekeeping())
+
+    async def _housekeeping(self):
+        """Periodically drop backlogs whose run disconnected past the TTL"""
+        while True:
+            await asyncio.sleep(_HOUSEKEEPING_INTERVAL)
+            now = time.monotonic()
+            expired = [rid for rid, deadline in self._queue_expiry.items() if now >= deadline]
+            for rid in expired:
+                self._queue_expiry.pop(rid, None)
+                self.progress_queue.pop(rid, None)
     
     async def connect(self, websocket: WebSocket, run_id: str):
         """Accept a new WebSocket connection for a specific run"""
@@ -28,19 +100,20 @@ class ConnectionManager:
         
         if run_id not in self.active_connections:
             self.active_connections[run_id] = set()
-            self.locks[run_id] = asyncio.Lock()
-            self.progress_queue[run_id] = []
-        
+            self.progress_queue.setdefault(run_id, deque(maxlen=QUEUE_MAXLEN))
+
         self.active_connections[run_id].add(websocket)
-        print(f"✅ WebSocket connected for run #{run_id}")
-        
-        # Send any queued messages
-        if self.progress_queue[run_id]:
-            for msg in self.progress_queue[run_id]:
-                try:
-                    await websocket.send_json(msg)
-                except:
-                    pass
+        self._queue_expiry.pop(run_id, None)
+        logger.info("WebSocket connected for run #%s", run_id)
+
+        # Flush any queued backlog as one batched frame; failures just drop
+        # the backlog for this connection
+        backlog = self.progress_queue.get(run_id)
+        if backlog:
+            try:
+                await websocket.send_text(_encode({"batch": list(backlog)}))
+            except Exception:
+                pass
     
     def disconnect(self, websocket: WebSocket, run_id: str):
         """Remove a WebSocket connection"""
@@ -50,69 +123,122 @@ class ConnectionManager:
             # Clean up if no more connections
             if not self.active_connections[run_id]:
                 del self.active_connections[run_id]
-                if run_id in self.locks:
-                    del self.locks[run_id]
-                # Keep queue for a while in case client reconnects
+                flusher = self._flushers.pop(run_id, None)
+                if flusher is not None:
+                    flusher.cancel()
+                self._send_queues.pop(run_id, None)
+                # Keep the backlog for a while in case the client
+                # reconnects; housekeeping drops it after the TTL
+                self._queue_expiry[run_id] = time.monotonic() + QUEUE_TTL
         
-        print(f"❌ WebSocket disconnected for run #{run_id}")
+        logger.info("WebSocket disconnected for run #%s", run_id)
     
-    async def send_progress(self, run_id: str, message: dict):
-        """Send progress update to all connections for a specific run"""
+    async def send_progress(self, run_id: str, message: Progress):
+        """Queue a progress update; the per-run flusher batches the sends"""
+        self._enqueue(run_id, message)
+
+    def _enqueue(self, run_id: str, message: Progress):
+        """Loop-side enqueue; must be called from the event loop thread"""
         if run_id not in self.active_connections:
             # Queue the message if no connections yet
-            if run_id not in self.progress_queue:
-                self.progress_queue[run_id] = []
-            self.progress_queue[run_id].append(message)
-            print(f"📦 Queued message for run #{run_id} (no active connections)")
+            self.progress_queue.setdefault(run_id, deque(maxlen=QUEUE_MAXLEN)).append(message)
+            logger.debug("Queued message for run #%s (no active connections)", run_id)
             return
-        
-        async with self.locks[run_id]:
-            disconnected = set()
-            
-            for connection in self.active_connections[run_id]:
+
+        send_queue = self._send_queues.get(run_id)
+        if send_queue is None:
+            send_queue = self._send_queues[run_id] = asyncio.Queue()
+            self._flushers[run_id] = asyncio.create_task(self._flusher(run_id, send_queue))
+        send_queue.put_nowait(message)
+
+    async def _flusher(self, run_id: str, send_queue: asyncio.Queue):
+        """Drain the run's queue, coalescing bursts into one frame each.
+
+        Blocks on the first message, then greedily collects whatever else
+        is already queued (up to BATCH_MAX) so a burst of progress events
+        costs one WebSocket frame per connection instead of one per event.
+        """
+        while True:
+            batch = [await send_queue.get()]
+            while len(batch) < BATCH_MAX:
                 try:
-                    await connection.send_json(message)
-                    print(f"📤 Sent to WebSocket for run #{run_id}: {message['message'][:50]}")
-                except Exception as e:
-                    print(f"Error sending to WebSocket: {e}")
-                    disconnected.add(connection)
-            
-            # Remove disconnected connections
-            for connection in disconnected:
-                self.active_connections[run_id].discard(connection)
+                    batch.append(send_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            await self._broadcast(run_id, {"batch": batch})
+
+    async def _broadcast(self, run_id: str, message: dict):
+        """Send one frame to every connection subscribed to a run"""
+        # Snapshot without locking: sends don't mutate the set, and set
+        # membership changes from connect/disconnect are atomic under the
+        # GIL, so the gather below never needs to serialize producers
+        connections = list(self.active_connections.get(run_id, ()))
+        if not connections:
+            return
+
+        # Encode once; send_json would re-serialize per connection
+        payload = _encode(message)
+
+        # Overlap the sends so the slowest client no longer serializes
+        # the rest; exceptions mark that connection as dead
+        results = await asyncio.gather(
+            *(connection.send_text(payload) for connection in connections),
+            return_exceptions=True,
+        )
+
+        disconnected = set()
+        for connection, result in zip(connections, results):
+            if isinstance(result, Exception):
+                logger.warning("Error sending to WebSocket: %s", result)
+                disconnected.add(connection)
+            else:
+                logger.debug("Sent batch to WebSocket for run #%s", run_id)
+
+        # Remove disconnected connections
+        if disconnected:
+            current = self.active_connections.get(run_id)
+            if current is not None:
+                current.difference_update(disconnected)
     
     def send_progress_sync(self, run_id: str, status: str, message: str, data: dict = None):
         """Thread-safe synchronous wrapper for sending progress from background tasks"""
-        msg = {
-            "status": status,
-            "message": message,
-            "timestamp": __import__('datetime').datetime.now().isoformat()
-        }
-        if data:
-            msg["data"] = data
-        
-        print(f"📡 [Thread] Progress for run #{run_id}: {message}")
-        
-        # If we have the main loop, schedule the coroutine
+        msg = Progress(
+            status=status,
+            message=message,
+            # Wire format stays an ISO string: the frontend dedups on the
+            # (message, timestamp) pair
+            timestamp=datetime.now().isoformat(),
+            data=data or None,
+        )
+
+        logger.debug("[thread] Progress for run #%s: %.80s", run_id, message)
+
         if self.main_loop and self.main_loop.is_running():
-            try:
-                asyncio.run_coroutine_threadsafe(
-                    self.send_progress(str(run_id), msg),
-                    self.main_loop
-                )
-                print(f"✅ Scheduled progress send for run #{run_id}")
-            except Exception as e:
-                print(f"❌ Failed to schedule progress: {e}")
-                # Fallback: queue the message
-                if str(run_id) not in self.progress_queue:
-                    self.progress_queue[str(run_id)] = []
-                self.progress_queue[str(run_id)].append(msg)
+            # Hand the message to the loop through the SimpleQueue and wake
+            # the drainer at most once per burst — run_coroutine_threadsafe
+            # would allocate a Future and a callback per event
+            self._tx.put_nowait((str(run_id), msg))
+            if not self._wake_scheduled.is_set():
+                self._wake_scheduled.set()
+                try:
+                    self.main_loop.call_soon_threadsafe(self._wake)
+                except Exception as e:
+                    logger.error("Failed to schedule progress: %s", e)
+                    self._wake_scheduled.clear()
         else:
             # No loop available, queue the message
-            print(f"⚠️ No event loop, queuing message for run #{run_id}")
-            if str(run_id) not in self.progress_queue:
-                self.progress_queue[str(run_id)] = []
-            self.progress_queue[str(run_id)].append(msg)
+            logger.debug("No event loop, queuing message for run #%s", run_id)
+            self.progress_queue.setdefault(str(run_id), deque(maxlen=QUEUE_MAXLEN)).append(msg)
+
+    def _wake(self):
+        """Loop-side wake callback: drain everything the threads queued"""
+        self._wake_scheduled.clear()
+        while True:
+            try:
+                run_id, msg = self._tx.get_nowait()
+            except queue.Empty:
+                break
+            self._enqueue(run_id, msg)
 
 
 # Global instance
@@ -7,61 +7,118 @@ import sys
 import subprocess
 import json
 import os
+import logging
+import threading
 import time
+from collections import deque
+
+# Status lines go through logging (stderr) so stdout stays the
+# machine-readable channel: streamed test output plus the JSON
+# report between the === AGENT OUTPUT === markers
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+# Lines of subprocess output retained for the final JSON report; older
+# lines are echoed live but dropped from memory
+TAIL_LINES = 4000
+
+
+def _run_streaming(cmd, timeout, env=None):
+    """Run cmd, echoing its output live while keeping only a bounded tail.
+
+    Unlike capture_output=True this never holds the whole stdout in RAM:
+    merged stdout/stderr is forwarded line by line to our own stdout (so
+    the host sees progress in the container logs as it happens) and only
+    the last TAIL_LINES lines are kept for the result. Raises
+    subprocess.TimeoutExpired like subprocess.run would.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1,
+        env=env,
+    )
+    tail = deque(maxlen=TAIL_LINES)
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            tail.append(line)
+            sys.stdout.write(line)
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    return subprocess.CompletedProcess(cmd, returncode, ''.join(tail), '')
 
 
 def install_dependencies():
     """Install project dependencies"""
     if os.path.exists('requirements.txt'):
-        print("📦 Installing dependencies...")
+        logger.info("📦 Installing dependencies...")
         start = time.time()
-        
-        result = subprocess.run(
-            ['pip', 'install', '--user', '--no-cache-dir', '-r', 'requirements.txt'],
-            capture_output=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=300
+
+        # --prefer-binary skips source builds when a wheel exists, and the
+        # pip cache is left enabled: mount a persistent volume with
+        # `docker run -v pip-cache:/root/.cache/pip` and repeat installs
+        # become local wheel copies instead of downloads
+        result = _run_streaming(
+            ['pip', 'install', '--user', '--prefer-binary', '-r', 'requirements.txt'],
+            timeout=300,
+            env={
+                'PIP_DISABLE_PIP_VERSION_CHECK': '1',
+                'PIP_NO_INPUT': '1',
+                **os.environ,
+            }
         )
-        
+
         elapsed = time.time() - start
-        
+
         if result.returncode == 0:
-            print(f"✅ Dependencies installed in {elapsed:.1f}s")
+            logger.info("✅ Dependencies installed in %.1fs", elapsed)
             return True
         else:
-            print(f"⚠️ Dependency installation had warnings: {result.stderr[:200]}")
+            logger.warning("⚠️ Dependency installation had warnings: %s", result.stdout[-200:])
             return True  # Continue anyway
     
     elif os.path.exists('package.json'):
-        print("📦 Detected Node.js project (package.json)")
+        logger.info("📦 Detected Node.js project (package.json)")
         # Could add npm support here
         return False
     
     else:
-        print("⚠️ No requirements.txt found, skipping dependency installation")
+        logger.warning("⚠️ No requirements.txt found, skipping dependency installation")
         return True
 
 
 def run_tests():
     """Run pytest with enhanced output"""
-    print("🧪 Running tests...")
+    logger.info("🧪 Running tests...")
     start = time.time()
     
-    result = subprocess.run(
+    result = _run_streaming(
         ['python', '-m', 'pytest', '--maxfail=10', '-v', '--tb=short', '--color=yes'],
-        capture_output=True,
-        encoding='utf-8',
-        errors='replace',
         timeout=120
     )
     
     elapsed = time.time() - start
     
     if result.returncode == 0:
-        print(f"✅ All tests passed in {elapsed:.1f}s")
+        logger.info("✅ All tests passed in %.1fs", elapsed)
     else:
-        print(f"❌ Tests failed (exit code {result.returncode}) after {elapsed:.1f}s")
+        logger.info("❌ Tests failed (exit code %s) after %.1fs", result.returncode, elapsed)
     
     return result
 
@@ -71,9 +128,9 @@ def main():
     Main entrypoint for Docker agent
     Expected to run inside /workspace directory
     """
-    print("🐳 Docker Agent Starting...")
-    print(f"📂 Working directory: {os.getcwd()}")
-    print(f"🐍 Python: {sys.version.split()[0]}")
+    logger.info("🐳 Docker Agent Starting...")
+    logger.info("📂 Working directory: %s", os.getcwd())
+    logger.info("🐍 Python: %s", sys.version.split()[0])
     
     try:
         # Step 1: Install dependencies
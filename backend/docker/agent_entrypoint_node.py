@@ -4,54 +4,121 @@ Node.js Agent Entrypoint for Docker Container
 Installs dependencies and runs tests with enhanced output
 """
 import sys
+import shlex
 import subprocess
 import json
 import os
+import logging
+import threading
 import time
+from collections import deque
+
+# Status lines go through logging (stderr) so stdout stays the
+# machine-readable channel: streamed test output plus the JSON
+# report between the === AGENT OUTPUT === markers
+logging.basicConfig(level=logging.INFO, format='%(message)s')
+logger = logging.getLogger(__name__)
+
+# Lines of subprocess output retained for the final JSON report; older
+# lines are echoed live but dropped from memory
+TAIL_LINES = 4000
+
+# orjson parses ~3x faster than stdlib json, but the agent image may not
+# ship it — fall back silently
+try:
+    import orjson as _json_fast
+except ImportError:
+    _json_fast = None
+
+_pkg_cache = None
+
+
+def load_pkg():
+    """Read and parse package.json once; later calls reuse the parsed dict"""
+    global _pkg_cache
+    if _pkg_cache is None and os.path.exists('package.json'):
+        with open('package.json', 'rb') as f:
+            raw = f.read()
+        _pkg_cache = _json_fast.loads(raw) if _json_fast is not None else json.loads(raw)
+    return _pkg_cache
+
+
+def _run_streaming(cmd, timeout, env=None):
+    """Run cmd, echoing its output live while keeping only a bounded tail.
+
+    Unlike capture_output=True this never holds the whole stdout in RAM:
+    merged stdout/stderr is forwarded line by line to our own stdout (so
+    the host sees progress in the container logs as it happens) and only
+    the last TAIL_LINES lines are kept for the result. Raises
+    subprocess.TimeoutExpired like subprocess.run would.
+    """
+    proc = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        encoding='utf-8',
+        errors='replace',
+        bufsize=1,
+        env=env,
+    )
+    tail = deque(maxlen=TAIL_LINES)
+    timed_out = threading.Event()
+
+    def _kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, _kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            tail.append(line)
+            sys.stdout.write(line)
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+
+    return subprocess.CompletedProcess(cmd, returncode, ''.join(tail), '')
 
 
 def install_dependencies():
     """Install npm dependencies"""
     if os.path.exists('package.json'):
-        print("📦 Installing npm dependencies...")
+        logger.info("📦 Installing npm dependencies...")
         start = time.time()
         
         # Use npm ci if package-lock.json exists, otherwise npm install
         if os.path.exists('package-lock.json'):
             cmd = ['npm', 'ci', '--prefer-offline', '--no-audit']
-            print("  Using npm ci (lockfile found)")
+            logger.info("  Using npm ci (lockfile found)")
         elif os.path.exists('yarn.lock'):
             cmd = ['yarn', 'install', '--frozen-lockfile', '--prefer-offline']
-            print("  Using yarn (yarn.lock found)")
+            logger.info("  Using yarn (yarn.lock found)")
         else:
             cmd = ['npm', 'install', '--prefer-offline', '--no-audit']
-            print("  Using npm install")
-        
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            encoding='utf-8',
-            errors='replace',
-            timeout=300  # 5 minute timeout
-        )
+            logger.info("  Using npm install")
         
+        result = _run_streaming(cmd, timeout=300)  # 5 minute timeout
+
         elapsed = time.time() - start
-        
+
         if result.returncode == 0:
-            print(f"✅ Dependencies installed in {elapsed:.1f}s")
+            logger.info("✅ Dependencies installed in %.1fs", elapsed)
             return True
         else:
-            print(f"⚠️ Dependency installation had warnings:")
-            print(result.stderr[:500])
+            logger.warning("⚠️ Dependency installation had warnings:\n%s", result.stdout[-500:])
             return True  # Continue anyway, tests might still work
     else:
-        print("⚠️ No package.json found, skipping dependency installation")
+        logger.warning("⚠️ No package.json found, skipping dependency installation")
         return False
 
 
 def run_tests():
     """Run npm test (or lint/build as fallback)"""
-    print("🧪 Running tests...")
+    logger.info("🧪 Running tests...")
     start = time.time()
     
     # Check package.json for available scripts
@@ -59,64 +126,55 @@ def run_tests():
     
     if os.path.exists('package.json'):
         try:
-            with open('package.json', 'r') as f:
-                package_data = json.load(f)
-            
+            package_data = load_pkg()
+
             scripts = package_data.get('scripts', {})
             
             #Check if test script exists and is not a placeholder
             if 'test' not in scripts:
-                print("⚠️  No test script found in package.json")
+                logger.warning("⚠️  No test script found in package.json")
                 
                 # Try lint as fallback - use npx to ensure binary is found
                 if 'lint' in scripts:
-                    print("✓ Using lint script instead")
-                    # Extract the actual command (e.g., "eslint .") and prepend npx
+                    logger.info("✓ Using lint script instead")
+                    # Extract the actual command (e.g., "eslint .") and prepend npx;
+                    # shlex keeps quoted arguments intact without needing a shell
                     lint_cmd = scripts['lint']
-                    test_cmd = ['npx', '--no-install'] + lint_cmd.split()
+                    test_cmd = ['npx', '--no-install'] + shlex.split(lint_cmd)
                 elif 'build' in scripts:
-                    print("✓ Using build script instead")
+                    logger.info("✓ Using build script instead")
                     test_cmd = ['npm', 'run', 'build']
                 else:
-                    print("⚠️  No test/lint/build scripts available")
+                    logger.warning("⚠️  No test/lint/build scripts available")
             else:
                 test_script = scripts['test']
                 # Check if it's a placeholder
                 if 'no test' in test_script.lower() or ('echo' in test_script.lower() and 'error' in test_script.lower()):
-                    print(f"⚠️  Test script is placeholder: {test_script}")
+                    logger.warning("⚠️  Test script is placeholder: %s", test_script)
                     
                     # Try lint as fallback - use npx
                     if 'lint' in scripts:
-                        print("✓ Using lint script instead")
+                        logger.info("✓ Using lint script instead")
                         lint_cmd = scripts['lint']
-                        test_cmd = ['npx', '--no-install'] + lint_cmd.split()
+                        test_cmd = ['npx', '--no-install'] + shlex.split(lint_cmd)
                     elif 'build' in scripts:
-                        print("✓ Using build script instead")
+                        logger.info("✓ Using build script instead")
                         test_cmd = ['npm', 'run', 'build']
         
         except Exception as e:
-            print(f"⚠️  Error reading package.json: {e}")
-    
-    print(f"Running: {' '.join(test_cmd)}")
+            logger.warning("⚠️  Error reading package.json: %s", e)
     
-    # Convert to string for shell execution
-    cmd_string = ' '.join(test_cmd)
-    
-    result = subprocess.run(
-        cmd_string,
-        capture_output=True,
-        encoding='utf-8',
-        errors='replace',
-        timeout=120,  # 2 minute timeout
-        shell=True
-    )
+    logger.info("Running: %s", ' '.join(test_cmd))
+
+    # Pass the argv list directly — no /bin/sh fork or re-tokenizing
+    result = _run_streaming(test_cmd, timeout=120)  # 2 minute timeout
     
     elapsed = time.time() - start
     
     if result.returncode == 0:
-        print(f"✅ All tests passed in {elapsed:.1f}s")
+        logger.info("✅ All tests passed in %.1fs", elapsed)
     else:
-        print(f"❌ Tests failed (exit code {result.returncode}) after {elapsed:.1f}s")
+        logger.info("❌ Tests failed (exit code %s) after %.1fs", result.returncode, elapsed)
     
     return result
 
@@ -159,7 +217,7 @@ def main():
         return output['returncode']
         
     except subprocess.TimeoutExpired as e:
-        print(f"\n❌ Command timed out: {e}")
+        logger.error("❌ Command timed out: %s", e)
         output = {
             'stdout': '',
             'stderr': f'Command timed out: {e}',
@@ -175,7 +233,7 @@ def main():
         return 124
         
     except Exception as e:
-        print(f"\n❌ Error: {e}")
+        logger.error("❌ Error: %s", e)
         output = {
             'stdout': '',
             'stderr': str(e),
@@ -23,27 +23,16 @@ def migrate():
     """Add error_message column if it doesn't exist"""
     print(f"🔧 Connecting to database...")
     with engine.connect() as conn:
-        # Check if column exists
-        check_query = text("""
-            SELECT column_name 
-            FROM information_schema.columns 
-            WHERE table_name='agent_runs' AND column_name='error_message';
+        # IF NOT EXISTS (PG 9.6+) makes the statement idempotent on its
+        # own, so there's no separate information_schema probe — one server
+        # round-trip instead of two
+        alter_query = text("""
+            ALTER TABLE agent_runs
+            ADD COLUMN IF NOT EXISTS error_message TEXT;
         """)
-        
-        result = conn.execute(check_query)
-        exists = result.fetchone()
-        
-        if not exists:
-            print("Adding error_message column...")
-            alter_query = text("""
-                ALTER TABLE agent_runs 
-                ADD COLUMN error_message TEXT;
-            """)
-            conn.execute(alter_query)
-            conn.commit()
-            print("✅ Migration completed: error_message column added")
-        else:
-            print("✅ Column already exists, no migration needed")
+        conn.execute(alter_query)
+        conn.commit()
+        print("✅ Migration completed: error_message column present")
 
 if __name__ == "__main__":
     migrate()
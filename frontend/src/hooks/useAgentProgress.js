@@ -27,17 +27,25 @@ export const useAgentProgress = (runId) => {
       try {
         const data = JSON.parse(event.data);
         console.log('📨 Received progress:', data);
-        
-        // Update current status
-        setCurrentStatus(data.status);
-        
+
+        // The server coalesces bursts into {batch: [...]} frames;
+        // plain single-message frames still work
+        const items = Array.isArray(data.batch) ? data.batch : [data];
+        if (items.length === 0) return;
+
+        // Update current status from the newest message
+        setCurrentStatus(items[items.length - 1].status);
+
         // Add to progress log (prevent duplicates)
         setProgress(prev => {
-          const isDuplicate = prev.some(
-            item => item.message === data.message && item.timestamp === data.timestamp
-          );
-          if (isDuplicate) return prev;
-          return [...prev, data];
+          const next = [...prev];
+          for (const item of items) {
+            const isDuplicate = next.some(
+              existing => existing.message === item.message && existing.timestamp === item.timestamp
+            );
+            if (!isDuplicate) next.push(item);
+          }
+          return next.length === prev.length ? prev : next;
         });
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
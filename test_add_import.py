@@ -1,48 +1,34 @@
+import os
 import sys
-sys.path.insert(0, 'backend')
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
 
 from app.languages.javascript_fixer import JavaScriptFixer
 from app.models import ErrorInfo, ErrorType
-import os
 
-# Create test file with missing imports
-test_file = 'backend/workspace/test_missing_import.jsx'
-os.makedirs(os.path.dirname(test_file), exist_ok=True)
-
-with open(test_file, 'w') as f:
-    f.write("""import { useNavigate } from "react-router-dom";
+SRC = """import { useNavigate } from "react-router-dom";
 
 function Test() {
     const [count, setCount] = useState(0);
     return <div>{count}</div>;
 }
-""")
-
-# Create error for missing useState
-error = ErrorInfo(
-    file=test_file,
-    line=4,
-    type=ErrorType.LOGIC,
-    message="'useState' is not defined (no-undef)"
-)
-
-fixer = JavaScriptFixer()
-print(f"Testing fix for: {error.message}")
-print(f"File: {error.file}:{error.line}\n")
-print("Before fix:")
-with open(test_file, 'r') as f:
-    print(f.read())
-
-result = fixer.fix_error(error)
-
-print(f'\n{"="*50}')
-print(f'Fix successful: {result}')
-print(f'{"="*50}\n')
-
-# Show the fixed content
-print('After fix:')
-with open(test_file, 'r') as f:
-    print(f.read())
-
-# Cleanup
-os.remove(test_file)
+"""
+
+
+def test_adds_missing_usestate_import(tmp_path):
+    test_file = tmp_path / 'test_missing_import.jsx'
+    test_file.write_text(SRC)
+
+    error = ErrorInfo(
+        file=str(test_file),
+        line=4,
+        type=ErrorType.LOGIC,
+        message="'useState' is not defined (no-undef)"
+    )
+
+    assert JavaScriptFixer().fix_error(error)
+
+    fixed = test_file.read_text()
+    assert "import { useState } from 'react';" in fixed
+    # The existing import is untouched
+    assert 'import { useNavigate } from "react-router-dom";' in fixed